@@ -1,6 +1,9 @@
 import configparser
 import os
-from typing import List
+from typing import Dict, List
+
+# 默认数据库名称（对应[DATABASE]章节的db_path）
+DEFAULT_DB_NAME = "default"
 
 class ConfigLoader:
     def __init__(self, config_path: str = "config.ini"):
@@ -15,40 +18,81 @@ class ConfigLoader:
         
         # 加载各模块配置
         self.db_path = self._load_db_config()
+        self.databases = self._load_databases_config()
+        self.query_timeout, self.query_workers = self._load_fanout_config()
         self.api_keys = self._load_api_auth_config()
         self.service_host, self.service_port = self._load_service_config()
+        self.poll_interval, self.heartbeat_interval = self._load_subscription_config()
+        self.warm_pages, self.hot_queries = self._load_startup_config()
 
     def _load_db_config(self) -> str:
-        """加载数据库路径，含文件存在性、路径类型检查"""
+        """加载默认数据库路径"""
         try:
             db_path = self.config.get("DATABASE", "db_path").strip()
-            # 相对路径转项目根目录绝对路径
-            if not os.path.isabs(db_path):
-                project_root = os.path.dirname(os.path.abspath(__file__))
-                db_path = os.path.join(project_root, db_path)
-            
-            # 检查数据库文件是否存在
-            if not os.path.exists(db_path):
-                raise FileNotFoundError(
-                    f"数据库文件不存在！\n"
-                    f"当前配置路径：{db_path}\n"
-                    f"请检查[DATABASE]章节db_path或确认文件存在"
-                )
-            
-            # 检查路径是否为文件（避免配置成目录）
-            if os.path.isdir(db_path):
-                raise IsADirectoryError(
-                    f"db_path是目录而非文件！\n"
-                    f"当前配置：{db_path}\n"
-                    f"请指定具体SQLite文件（如./data/game_db.db）"
-                )
-            
-            return db_path
+            return self._check_db_path(db_path, "[DATABASE]章节db_path")
         except configparser.NoSectionError:
             raise Exception("配置文件缺少 [DATABASE] 章节")
         except configparser.NoOptionError:
             raise Exception("配置文件[DATABASE]章节缺少 db_path 配置项")
 
+    def _load_databases_config(self) -> Dict[str, str]:
+        """加载命名数据库列表（默认库 + [DATABASES]章节，可选）"""
+        databases = {DEFAULT_DB_NAME: self.db_path}
+        if not self.config.has_section("DATABASES"):
+            return databases
+        
+        for name, db_path in self.config.items("DATABASES"):
+            name = name.strip()
+            if name == DEFAULT_DB_NAME or name == "*" or "," in name:
+                raise Exception(
+                    f"配置文件[DATABASES]章节的数据库名称 {name} 无效！\n"
+                    f"名称不能为 {DEFAULT_DB_NAME}、* 或包含英文逗号"
+                )
+            databases[name] = self._check_db_path(db_path.strip(), f"[DATABASES]章节{name}")
+        return databases
+
+    def _load_fanout_config(self) -> tuple:
+        """加载多库并发查询的单库超时（秒）和线程数，均可选
+        
+        线程池由所有并发请求共享，默认按每个库8个并发查询计算
+        """
+        try:
+            timeout = self.config.getfloat("DATABASE", "query_timeout", fallback=10.0)
+            workers = self.config.getint("DATABASE", "query_workers", fallback=len(self.databases) * 8)
+        except ValueError:
+            raise Exception("配置文件[DATABASE]章节的 query_timeout/query_workers 必须为数字")
+        
+        if timeout <= 0:
+            raise Exception(f"查询超时 {timeout} 无效（需大于0秒）")
+        if workers < 1:
+            raise Exception(f"查询线程数 {workers} 无效（需至少为1）")
+        return timeout, workers
+
+    def _check_db_path(self, db_path: str, option_desc: str) -> str:
+        """数据库路径转换与校验，含文件存在性、路径类型检查"""
+        # 相对路径转项目根目录绝对路径
+        if not os.path.isabs(db_path):
+            project_root = os.path.dirname(os.path.abspath(__file__))
+            db_path = os.path.join(project_root, db_path)
+        
+        # 检查数据库文件是否存在
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(
+                f"数据库文件不存在！\n"
+                f"当前配置路径：{db_path}\n"
+                f"请检查{option_desc}或确认文件存在"
+            )
+        
+        # 检查路径是否为文件（避免配置成目录）
+        if os.path.isdir(db_path):
+            raise IsADirectoryError(
+                f"{option_desc}是目录而非文件！\n"
+                f"当前配置：{db_path}\n"
+                f"请指定具体SQLite文件（如./data/game_db.db）"
+            )
+        
+        return db_path
+
     def _load_api_auth_config(self) -> List[str]:
         """加载API Key列表，去重去空"""
         try:
@@ -80,6 +124,33 @@ class ConfigLoader:
         except ValueError:
             raise Exception("配置文件[SERVICE]章节的 port 必须为整数")
 
+    def _load_subscription_config(self) -> tuple:
+        """加载变更订阅的检查间隔和心跳间隔（秒），[SUBSCRIPTION]章节可选"""
+        try:
+            poll_interval = self.config.getfloat("SUBSCRIPTION", "poll_interval", fallback=1.0)
+            heartbeat_interval = self.config.getfloat("SUBSCRIPTION", "heartbeat_interval", fallback=15.0)
+        except ValueError:
+            raise Exception("配置文件[SUBSCRIPTION]章节的 poll_interval/heartbeat_interval 必须为数字")
+        
+        if poll_interval <= 0 or heartbeat_interval <= 0:
+            raise Exception("配置文件[SUBSCRIPTION]章节的间隔时间必须大于0秒")
+        return poll_interval, heartbeat_interval
+
+    def _load_startup_config(self) -> tuple:
+        """加载启动预热配置（是否预读数据库文件、热点查询列表），[STARTUP]章节可选"""
+        try:
+            warm_pages = self.config.getboolean("STARTUP", "warm_pages", fallback=False)
+        except ValueError:
+            raise Exception("配置文件[STARTUP]章节的 warm_pages 必须为 true/false")
+        
+        # 热点查询每行一条，仅允许只读的SELECT语句（raw读取，LIKE中的%无需转义）
+        hot_queries_str = self.config.get("STARTUP", "hot_queries", raw=True, fallback="")
+        hot_queries = [line.strip() for line in hot_queries_str.splitlines() if line.strip()]
+        for sql in hot_queries:
+            if not sql.upper().startswith("SELECT"):
+                raise Exception(f"配置文件[STARTUP]章节的 hot_queries 仅支持SELECT语句：{sql}")
+        return warm_pages, hot_queries
+
 # 延迟初始化配置，避免循环导入
 config = None
 
@@ -1,30 +1,132 @@
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
-from config import get_config  # 用延迟加载的配置
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Callable
+from config import get_config, DEFAULT_DB_NAME  # 用延迟加载的配置
 
-def get_db_connection():
+# 多库并发查询线程池（延迟创建）及线程内查询截止时间
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+_query_local = threading.local()
+
+def resolve_db_path(db_name: Optional[str] = None) -> str:
+    """按名称获取数据库路径（为空时返回默认库）"""
+    config = get_config()
+    # 配置中的库名已被configparser转为小写，查找时不区分大小写
+    name = (db_name or DEFAULT_DB_NAME).lower()
+    if name not in config.databases:
+        raise Exception(f"未配置的数据库：{name}（可选：{', '.join(config.databases)}）")
+    return config.databases[name]
+
+def get_db_connection(db_name: Optional[str] = None):
     """创建数据库连接，含双重文件检查"""
+    db_path = None
     try:
-        config = get_config()  # 获取配置
+        db_path = resolve_db_path(db_name)
         # 双重检查：避免服务运行中文件被删除
-        if not os.path.exists(config.db_path):
+        if not os.path.exists(db_path):
             raise FileNotFoundError(
                 f"数据库文件已丢失！\n"
-                f"路径：{config.db_path}\n"
+                f"路径：{db_path}\n"
                 f"请恢复文件后重启服务"
             )
         
-        conn = sqlite3.connect(config.db_path, check_same_thread=False)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # 结果以字典格式返回
+        # 并发查询超时后中断仍在执行的SQL，避免慢库占满线程池
+        deadline = getattr(_query_local, "deadline", None)
+        if deadline is not None:
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
         return conn
     except Exception as e:
-        raise Exception(f"数据库连接失败：{str(e)}（路径：{config.db_path}）")
+        raise Exception(f"数据库连接失败：{str(e)}（路径：{db_path or db_name}）")
+
+def resolve_db_selector(selector: Optional[str]) -> List[str]:
+    """解析数据库选择器：为空=默认库，*=全部库，多个名称用英文逗号分隔"""
+    config = get_config()
+    if not selector or not selector.strip():
+        return [DEFAULT_DB_NAME]
+    if selector.strip() == "*":
+        return list(config.databases)
+    
+    names = []
+    for name in selector.split(","):
+        # 配置中的库名已被configparser转为小写，选择器不区分大小写
+        name = name.strip().lower()
+        if not name or name in names:
+            continue
+        if name not in config.databases:
+            raise ValueError(f"未配置的数据库：{name}（可选：{', '.join(config.databases)}）")
+        names.append(name)
+    if not names:
+        raise ValueError("db参数不能为空（传入数据库名称或*）")
+    return names
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """获取多库并发查询线程池（单例）"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=get_config().query_workers,
+                    thread_name_prefix="db-fanout"
+                )
+    return _fanout_executor
+
+def _run_with_deadline(query_func: Callable, timeout: float, *args, **kwargs):
+    """在线程池中执行查询，截止时间从任务开始执行时计算，期间新建的连接受其约束"""
+    _query_local.deadline = time.monotonic() + timeout
+    try:
+        return query_func(*args, **kwargs)
+    finally:
+        _query_local.deadline = None
+
+def query_across_databases(
+    db_names: List[str],
+    query_func: Callable,
+    *args,
+    **kwargs
+) -> Dict[str, Dict[str, Any]]:
+    """多库并发查询：每个库单独调用query_func(db_name=库名)，单库超时由配置决定
+    
+    返回 {"results": {库名: 结果}, "errors": {库名: 错误信息}}，按db_names顺序
+    """
+    timeout = get_config().query_timeout
+    executor = _get_fanout_executor()
+    futures = {
+        name: executor.submit(_run_with_deadline, query_func, timeout, *args, db_name=name, **kwargs)
+        for name in db_names
+    }
+    wait(futures.values(), timeout=timeout)
+    
+    results, errors = {}, {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            errors[name] = f"查询超时（超过{timeout}秒）"
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = "查询超时（已中断）" if "interrupted" in str(e) else str(e)
+    return {"results": results, "errors": errors}
+
+def merge_tagged_rows(results: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """合并多库查询结果，每行以source_db标记来源库"""
+    return [
+        {"source_db": name, **row}
+        for name, rows in results.items()
+        for row in rows
+    ]
 
 def query_single_table(
     table_name: str, 
     conditions: Optional[Dict[str, Any]] = None, 
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    db_name: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """单表查询：支持条件筛选、指定字段（新增参数校验）"""
     conn = None
@@ -35,7 +137,7 @@ def query_single_table(
         if fields is not None and (not isinstance(fields, list) or len(fields) == 0):
             raise Exception("fields必须是非空列表（如['Id','Name']）")
         
-        conn = get_db_connection()
+        conn = get_db_connection(db_name)
         cursor = conn.cursor()
         
         # 处理查询字段
@@ -57,11 +159,14 @@ def query_single_table(
         if conn:
             conn.close()
 
-def query_related_tables(related_type: str, main_id: int) -> Dict[str, Any]:
+# 支持的关联查询类型
+RELATED_TYPES = ("player_social", "player_server")
+
+def query_related_tables(related_type: str, main_id: int, db_name: Optional[str] = None) -> Dict[str, Any]:
     """关联查询：玩家-社交账号、玩家-服务器"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(db_name)
         cursor = conn.cursor()
         result = {}
         
@@ -125,13 +230,111 @@ def query_related_tables(related_type: str, main_id: int) -> Dict[str, Any]:
         if conn:
             conn.close()
 
+# 仅统计/判断存在/取ID的查询模式（不构建行数据）
+MATCH_MODES = ("count", "exists", "ids")
+
+def _build_player_filters(
+    player_name: Optional[str] = None,
+    qq_number: Optional[str] = None,
+    qq_name: Optional[str] = None,
+    ip: Optional[str] = None,
+    uuid: Optional[str] = None
+) -> tuple:
+    """拼接玩家查询条件，返回(WHERE子句, 参数, 是否需要关联SocialAccount)"""
+    where_sql = "WHERE 1=1"
+    params = []
+    if player_name:
+        where_sql += " AND p.Name LIKE ?"
+        params.append(f"%{player_name}%")
+    if qq_number:
+        where_sql += " AND s.Uuid = ?"
+        params.append(qq_number)
+    if qq_name:
+        where_sql += " AND s.Name LIKE ?"
+        params.append(f"%{qq_name}%")
+    if ip:
+        where_sql += " AND p.Ip LIKE ?"
+        params.append(f"%{ip}%")
+    if uuid:
+        where_sql += " AND p.Uuid = ?"
+        params.append(uuid)
+    return where_sql, params, bool(qq_number or qq_name)
+
+def _player_from_clause(needs_social: bool) -> str:
+    """玩家查询的FROM子句：按QQ号/QQ昵称筛选时才关联SocialAccount
+    （条件作用于s列，等价于内连接，便于优化器从SocialAccount索引开始）"""
+    if needs_social:
+        return "FROM Player p JOIN SocialAccount s ON p.SocialAccountId = s.Id"
+    return "FROM Player p"
+
+def _build_group_filters(
+    group_id: Optional[int] = None,
+    group_name: Optional[str] = None,
+    enabled: Optional[int] = None,
+    min_member: Optional[int] = None,
+    max_member: Optional[int] = None
+) -> tuple:
+    """拼接Group表查询条件，返回(WHERE子句, 参数)"""
+    where_sql = "WHERE 1=1"
+    params = []
+    if group_id is not None:
+        where_sql += " AND GroupId = ?"
+        params.append(group_id)
+    if group_name:
+        where_sql += " AND Name LIKE ?"
+        params.append(f"%{group_name}%")
+    if enabled is not None:
+        where_sql += " AND Enabled = ?"
+        params.append(enabled)
+    if min_member is not None:
+        where_sql += " AND MemberCount >= ?"
+        params.append(min_member)
+    if max_member is not None:
+        where_sql += " AND MemberCount <= ?"
+        params.append(max_member)
+    return where_sql, params
+
+def _query_match(
+    mode: str,
+    from_clause: str,
+    id_column: str,
+    where_sql: str,
+    params: list,
+    db_name: Optional[str] = None
+):
+    """按模式执行匹配查询：count返回数量，exists返回是否存在，ids返回ID列表"""
+    if mode not in MATCH_MODES:
+        raise Exception(f"不支持的查询模式：{mode}（仅支持：{', '.join(MATCH_MODES)}）")
+    
+    if mode == "count":
+        sql = f"SELECT COUNT(*) AS count {from_clause} {where_sql}"
+    elif mode == "exists":
+        sql = f"SELECT EXISTS(SELECT 1 {from_clause} {where_sql} LIMIT 1) AS matched"
+    else:
+        sql = f"SELECT {id_column} AS id {from_clause} {where_sql}"
+    
+    conn = None
+    try:
+        conn = get_db_connection(db_name)
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        if mode == "count":
+            return cursor.fetchone()["count"]
+        if mode == "exists":
+            return bool(cursor.fetchone()["matched"])
+        return [row["id"] for row in cursor.fetchall()]
+    finally:
+        if conn:
+            conn.close()
+
 def query_player_by_multi_condition(
     player_name: Optional[str] = None,
     qq_number: Optional[str] = None,
     qq_name: Optional[str] = None,
     ip: Optional[str] = None,
     uuid: Optional[str] = None,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    db_name: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """玩家多维度查询：名称/QQ/IP/UUID"""
     if not (player_name or qq_number or qq_name or ip or uuid):
@@ -139,11 +342,13 @@ def query_player_by_multi_condition(
     
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(db_name)
         cursor = conn.cursor()
         
         # 处理查询字段
         player_fields = ", ".join(fields) if (fields and len(fields) > 0) else "p.*"
+        # 拼接查询条件
+        where_sql, params, _ = _build_player_filters(player_name, qq_number, qq_name, ip, uuid)
         # 左关联社交账号表
         sql = f"""
             SELECT {player_fields}, 
@@ -151,26 +356,8 @@ def query_player_by_multi_condition(
                    s.Name AS qq_name, s.Platform AS social_platform
             FROM Player p
             LEFT JOIN SocialAccount s ON p.SocialAccountId = s.Id
-            WHERE 1=1
+            {where_sql}
         """
-        params = []
-        
-        # 拼接查询条件
-        if player_name:
-            sql += " AND p.Name LIKE ?"
-            params.append(f"%{player_name}%")
-        if qq_number:
-            sql += " AND s.Uuid = ?"
-            params.append(qq_number)
-        if qq_name:
-            sql += " AND s.Name LIKE ?"
-            params.append(f"%{qq_name}%")
-        if ip:
-            sql += " AND p.Ip LIKE ?"
-            params.append(f"%{ip}%")
-        if uuid:
-            sql += " AND p.Uuid = ?"
-            params.append(uuid)
         
         # 执行查询并格式化结果
         cursor.execute(sql, params)
@@ -204,45 +391,39 @@ def get_player_id_by_multi_condition(
     player_name: Optional[str] = None,
     qq_number: Optional[str] = None,
     ip: Optional[str] = None,
-    uuid: Optional[str] = None
+    uuid: Optional[str] = None,
+    db_name: Optional[str] = None
 ) -> List[int]:
     """通过玩家名称、QQ号、IP、UUID查询玩家ID列表"""
     if not (player_name or qq_number or ip or uuid):
         raise Exception("至少需传入一个查询条件：player_name、qq_number、ip、uuid")
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        sql = """
-            SELECT p.Id 
-            FROM Player p
-            LEFT JOIN SocialAccount s ON p.SocialAccountId = s.Id
-            WHERE 1=1
-        """
-        params = []
-        
-        if player_name:
-            sql += " AND p.Name LIKE ?"
-            params.append(f"%{player_name}%")
-        if qq_number:
-            sql += " AND s.Uuid = ?"
-            params.append(qq_number)
-        if ip:
-            sql += " AND p.Ip LIKE ?"
-            params.append(f"%{ip}%")
-        if uuid:
-            sql += " AND p.Uuid = ?"
-            params.append(uuid)
-        
-        cursor.execute(sql, params)
-        return [row["Id"] for row in cursor.fetchall()]
+        where_sql, params, needs_social = _build_player_filters(
+            player_name=player_name, qq_number=qq_number, ip=ip, uuid=uuid
+        )
+        return _query_match("ids", _player_from_clause(needs_social), "p.Id", where_sql, params, db_name)
     except Exception as e:
         raise Exception(f"查询玩家ID失败：{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+
+def match_player_by_multi_condition(
+    mode: str,
+    player_name: Optional[str] = None,
+    qq_number: Optional[str] = None,
+    qq_name: Optional[str] = None,
+    ip: Optional[str] = None,
+    uuid: Optional[str] = None,
+    db_name: Optional[str] = None
+):
+    """玩家多维度匹配（count/exists/ids），无QQ条件时不关联SocialAccount"""
+    if not (player_name or qq_number or qq_name or ip or uuid):
+        raise Exception("至少需传入一个查询条件：player_name/qq_number/qq_name/ip/uuid")
+    
+    try:
+        where_sql, params, needs_social = _build_player_filters(player_name, qq_number, qq_name, ip, uuid)
+        return _query_match(mode, _player_from_clause(needs_social), "p.Id", where_sql, params, db_name)
+    except Exception as e:
+        raise Exception(f"玩家匹配查询失败（模式：{mode}）：{str(e)}")
 
 def query_group_by_condition(
     group_id: Optional[int] = None,
@@ -250,36 +431,20 @@ def query_group_by_condition(
     enabled: Optional[int] = None,
     min_member: Optional[int] = None,
     max_member: Optional[int] = None,
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None,
+    db_name: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """Group表查询：修复SQL关键字兼容（用双引号包裹表名）"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(db_name)
         cursor = conn.cursor()
         
         # 处理查询字段
         group_fields = ", ".join(fields) if (fields and len(fields) > 0) else "*"
         # 关键修复：用双引号包裹Group表名，兼容所有SQLite版本
-        sql = f"SELECT {group_fields} FROM \"Group\" WHERE 1=1"
-        params = []
-        
-        # 拼接查询条件
-        if group_id is not None:
-            sql += " AND GroupId = ?"
-            params.append(group_id)
-        if group_name:
-            sql += " AND Name LIKE ?"
-            params.append(f"%{group_name}%")
-        if enabled is not None:
-            sql += " AND Enabled = ?"
-            params.append(enabled)
-        if min_member is not None:
-            sql += " AND MemberCount >= ?"
-            params.append(min_member)
-        if max_member is not None:
-            sql += " AND MemberCount <= ?"
-            params.append(max_member)
+        where_sql, params = _build_group_filters(group_id, group_name, enabled, min_member, max_member)
+        sql = f"SELECT {group_fields} FROM \"Group\" {where_sql}"
         
         # 执行查询
         cursor.execute(sql, params)
@@ -290,11 +455,27 @@ def query_group_by_condition(
         if conn:
             conn.close()
 
-def get_table_count(table_name: str) -> int:
+def match_group_by_condition(
+    mode: str,
+    group_id: Optional[int] = None,
+    group_name: Optional[str] = None,
+    enabled: Optional[int] = None,
+    min_member: Optional[int] = None,
+    max_member: Optional[int] = None,
+    db_name: Optional[str] = None
+):
+    """Group表匹配（count/exists/ids，ids为群号GroupId列表）"""
+    try:
+        where_sql, params = _build_group_filters(group_id, group_name, enabled, min_member, max_member)
+        return _query_match(mode, 'FROM "Group"', "GroupId", where_sql, params, db_name)
+    except Exception as e:
+        raise Exception(f"Group表匹配查询失败（模式：{mode}）：{str(e)}")
+
+def get_table_count(table_name: str, db_name: Optional[str] = None) -> int:
     """查询表总记录数"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(db_name)
         cursor = conn.cursor()
         cursor.execute(f"SELECT COUNT(*) AS count FROM {table_name}")
         return cursor.fetchone()["count"]
@@ -1,21 +1,40 @@
 import json  # 新增：用于解析JSON字符串
-from fastapi import FastAPI, Query, HTTPException, Depends
-from typing import List, Optional, Dict, Any
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Query, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, JSONResponse
+from typing import List, Optional, Dict, Any, Callable
 from db_utils import (
     query_single_table, query_related_tables, get_table_count,
     query_player_by_multi_condition, query_group_by_condition,
-    get_player_id_by_multi_condition  # 新增：导入获取玩家ID的函数
+    get_player_id_by_multi_condition,  # 新增：导入获取玩家ID的函数
+    resolve_db_selector, query_across_databases, merge_tagged_rows, RELATED_TYPES,
+    MATCH_MODES, match_player_by_multi_condition, match_group_by_condition
 )
-from auth_utils import verify_api_key
+from subscription_utils import (
+    SUBSCRIBABLE_QUERIES, get_watcher, make_queue_callback, format_sse,
+    validate_subscription_params, run_subscription_query
+)
+from startup_utils import run_startup_checks, start_warmup, find_unknown_columns, startup_state
+from auth_utils import verify_api_key, api_key_header
 from config import get_config  # 用延迟加载的配置
 
-# 初始化FastAPI应用（全局API Key认证）
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动阶段：读取表结构、检查索引，随后后台预热（完成前/api/health返回未就绪）"""
+    await run_in_threadpool(run_startup_checks, SUPPORTED_TABLES)
+    start_warmup(SUPPORTED_TABLES)
+    yield
+
+# 初始化FastAPI应用（查询接口统一挂在需API Key认证的router上，健康检查除外）
 app = FastAPI(
     title="EasyBot数据库查询接口",
     description="支持API Key认证、全维度查询（玩家/Group表）",
     version="3.2",
-    dependencies=[Depends(verify_api_key)]
+    lifespan=lifespan
 )
+router = APIRouter(dependencies=[Depends(verify_api_key)])
 
 # 获取配置并定义支持的表名
 config = get_config()
@@ -23,14 +42,110 @@ SUPPORTED_TABLES = [
     "__EFMigrationsHistory", "Player", "ServerInfo",
     "SocialAccount", "PlayerServerInfo", "Group", "sqlite_sequence"
 ]
+DB_SELECTOR_DESC = (
+    f"目标数据库（可选：{', '.join(config.databases)}；多个用英文逗号分隔，*表示全部并发查询；"
+    f"不传则查询默认库，结果不带来源标记）"
+)
+
+def run_db_query(db: Optional[str], query_func: Callable, *args, merge: bool = True, **kwargs):
+    """按db选择器执行查询，返回(结果, 多库元信息)
+    
+    - db为空：直接查询默认库，元信息为空字典
+    - db非空：并发查询所选库，merge=True时合并行并以source_db标记来源，否则返回{库名: 结果}
+    """
+    if db is None:
+        return query_func(*args, **kwargs), {}
+    
+    try:
+        db_names = resolve_db_selector(db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    fanout = query_across_databases(db_names, query_func, *args, **kwargs)
+    if not fanout["results"]:
+        failed = "；".join(f"{name}: {msg}" for name, msg in fanout["errors"].items())
+        raise Exception(f"所有数据库查询均失败（{failed}）")
+    
+    results = merge_tagged_rows(fanout["results"]) if merge else fanout["results"]
+    meta = {
+        "databases": list(fanout["results"]),
+        "failed_databases": fanout["errors"]
+    }
+    return results, meta
+
+def check_columns(table_name: str, columns: Optional[List[str]], db: Optional[str]) -> None:
+    """用启动时缓存的表结构校验字段名（fields/conditions），无需访问SQLite即可拒绝无效字段"""
+    if not columns:
+        return
+    if isinstance(columns, str):
+        columns = [columns]
+    
+    # 兼容fields=Id,Name（逗号分隔）；玩家查询的p.前缀对应Player，s.前缀对应关联的SocialAccount
+    names_by_table: Dict[str, List[str]] = {table_name: []}
+    for item in columns:
+        for name in str(item).split(","):
+            name = name.strip()
+            target_table = table_name
+            if table_name == "Player" and name.startswith("p."):
+                name = name[2:]
+            elif table_name == "Player" and name.startswith("s."):
+                name, target_table = name[2:], "SocialAccount"
+            if name and name != "*":
+                names_by_table.setdefault(target_table, []).append(name)
+    
+    try:
+        db_names = resolve_db_selector(db)
+        unknown = {
+            table: find_unknown_columns(table, names, db_names, SUPPORTED_TABLES)
+            for table, names in names_by_table.items() if names
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"字段校验失败：{str(e)}")
+    unknown = {table: names for table, names in unknown.items() if names}
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail="；".join(f"{table}表不存在字段：{', '.join(names)}" for table, names in unknown.items())
+        )
+
+MATCH_MODE_DESC = (
+    "响应模式：count（仅匹配数量）、exists（是否存在匹配）、ids（仅ID列表），"
+    "不传则返回完整数据（指定模式时fields参数无效）"
+)
+
+def check_match_mode(mode: Optional[str]) -> None:
+    """校验响应模式参数"""
+    if mode is not None and mode not in MATCH_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的响应模式！仅支持：{', '.join(MATCH_MODES)}"
+        )
+
+def build_match_response(mode: str, result: Any, db_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """按响应模式组装结果字段（多库时result为{库名: 结果}）"""
+    if not db_meta:
+        if mode == "count":
+            return {"total_matched_count": result}
+        if mode == "exists":
+            return {"matched": result}
+        return {"total_matched_count": len(result), "data": result}
+    
+    if mode == "count":
+        return {"total_matched_count": sum(result.values()), "per_database_count": result}
+    if mode == "exists":
+        return {"matched": any(result.values()), "per_database_matched": result}
+    return {"total_matched_count": sum(len(ids) for ids in result.values()), "data": result}
 
 # ---------------------- 1. 基础查询接口 ----------------------
-@app.get("/api/single-table", summary="单表查询（修复参数解析错误）")
+@router.get("/api/single-table", summary="单表查询（修复参数解析错误）")
 def get_single_table(
     table_name: str = Query(..., description=f"表名，支持：{', '.join(SUPPORTED_TABLES)}"),
     # 关键修复：conditions改为str类型（接收JSON字符串）
     conditions: Optional[str] = Query(None, description="查询条件（JSON字符串，如'{\"Id\":1,\"Name\":\"Slide2_shutdown\"}'，需用单引号包裹）"),
-    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,IpString，默认所有字段）")
+    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,IpString，默认所有字段）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC)
 ):
     # 1. 表名校验
     if table_name not in SUPPORTED_TABLES:
@@ -56,23 +171,31 @@ def get_single_table(
                 detail=f"conditions解析失败：{str(e)}（检查引号配对/逗号是否多余）"
             )
     
-    # 3. 执行查询
+    # 3. 字段校验（表结构已在启动时缓存）
+    check_columns(table_name, fields, db)
+    check_columns(table_name, list(conditions_dict or {}), db)
+    
+    # 4. 执行查询
     try:
-        results = query_single_table(table_name, conditions_dict, fields)
+        results, db_meta = run_db_query(db, query_single_table, table_name, conditions_dict, fields)
         return {
             "status": "success",
             "table_name": table_name,
+            **db_meta,
             "total_count": len(results),
             "query_conditions": conditions_dict or "无",
             "return_fields": fields or "所有字段",
             "data": results
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"查询失败：{str(e)}")
 
-@app.get("/api/table-count", summary="查询表总记录数")
+@router.get("/api/table-count", summary="查询表总记录数")
 def get_table_record_count(
-    table_name: str = Query(..., description=f"表名，支持：{', '.join(SUPPORTED_TABLES)}")
+    table_name: str = Query(..., description=f"表名，支持：{', '.join(SUPPORTED_TABLES)}"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC)
 ):
     if table_name not in SUPPORTED_TABLES:
         raise HTTPException(
@@ -81,69 +204,114 @@ def get_table_record_count(
         )
     
     try:
-        count = get_table_count(table_name)
+        count, db_meta = run_db_query(db, get_table_count, table_name, merge=False)
+        if not db_meta:
+            return {
+                "status": "success",
+                "table_name": table_name,
+                "total_record_count": count
+            }
         return {
             "status": "success",
             "table_name": table_name,
-            "total_record_count": count
+            **db_meta,
+            "total_record_count": sum(count.values()),
+            "per_database_count": count
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"统计失败：{str(e)}")
 
-@app.get("/api/supported-tables", summary="获取支持的表名列表")
+@router.get("/api/supported-tables", summary="获取支持的表名列表")
 def get_supported_tables():
     return {
         "status": "success",
         "supported_tables": SUPPORTED_TABLES,
-        "total_table_count": len(SUPPORTED_TABLES)
+        "total_table_count": len(SUPPORTED_TABLES),
+        "supported_databases": list(config.databases)
     }
 
 # ---------------------- 2. 关联查询接口 ----------------------
-@app.get("/api/related-table", summary="玩家-社交账号/服务器关联查询（多维度）")
+def collect_related_data(
+    related_type: str,
+    player_id: Optional[int] = None,
+    player_name: Optional[str] = None,
+    qq_number: Optional[str] = None,
+    ip: Optional[str] = None,
+    uuid: Optional[str] = None,
+    db_name: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """在单个库中查询关联数据，未找到匹配玩家时返回None"""
+    # 优先使用player_id查询（related_type已在接口中校验，error仅表示该库无此玩家）
+    if player_id:
+        result = query_related_tables(related_type, player_id, db_name=db_name)
+        return None if "error" in result else result
+    
+    # 否则通过其他条件查询玩家ID列表
+    player_ids = get_player_id_by_multi_condition(
+        player_name=player_name,
+        qq_number=qq_number,
+        ip=ip,
+        uuid=uuid,
+        db_name=db_name
+    )
+    if not player_ids:
+        return None
+    
+    # 批量查询每个玩家ID的关联数据
+    results_list = []
+    for pid in player_ids:
+        result = query_related_tables(related_type, pid, db_name=db_name)
+        results_list.append({
+            "player_id": pid,
+            "related_data": result
+        })
+    return {"multi_player_results": results_list}
+
+@router.get("/api/related-table", summary="玩家-社交账号/服务器关联查询（多维度）")
 def get_related_table(
     related_type: str = Query(..., description="关联类型：player_social（玩家-社交账号）、player_server（玩家-服务器）"),
     player_id: Optional[int] = Query(None, description="玩家ID（如1、2，对应Player表的Id）"),
     player_name: Optional[str] = Query(None, description="玩家昵称（模糊匹配，如Slide2）"),
     qq_number: Optional[str] = Query(None, description="QQ号（精确匹配，如2651559189）"),
     ip: Optional[str] = Query(None, description="IP地址（模糊匹配，如114.88）"),
-    uuid: Optional[str] = Query(None, description="玩家UUID（精确匹配，如765537e9-af61-3ac2-9ae5-57256eadfed5）")
+    uuid: Optional[str] = Query(None, description="玩家UUID（精确匹配，如765537e9-af61-3ac2-9ae5-57256eadfed5）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC)
 ):
     """
     支持通过玩家ID、名称、QQ号、IP、UUID查询关联数据
     - 若传入player_id，直接查询该ID的关联数据
     - 若传入其他条件，先查询玩家ID列表，再批量查询关联数据
+    - 若传入db，按库并发查询，data为{库名: 关联数据}（仅包含找到玩家的库）
     """
+    if related_type not in RELATED_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail="仅支持 player_social（玩家-社交账号）、player_server（玩家-服务器）"
+        )
+    
     try:
-        # 优先使用player_id查询
-        if player_id:
-            results = query_related_tables(related_type, player_id)
-        else:
-            # 否则通过其他条件查询玩家ID列表
-            player_ids = get_player_id_by_multi_condition(
-                player_name=player_name,
-                qq_number=qq_number,
-                ip=ip,
-                uuid=uuid
-            )
-            if not player_ids:
-                raise HTTPException(status_code=404, detail="未找到匹配的玩家")
-            
-            # 批量查询每个玩家ID的关联数据
-            results_list = []
-            for pid in player_ids:
-                result = query_related_tables(related_type, pid)
-                results_list.append({
-                    "player_id": pid,
-                    "related_data": result
-                })
-            results = {"multi_player_results": results_list}
+        results, db_meta = run_db_query(
+            db, collect_related_data, related_type,
+            player_id=player_id,
+            player_name=player_name,
+            qq_number=qq_number,
+            ip=ip,
+            uuid=uuid,
+            merge=False
+        )
+        if db_meta:
+            # 多库：仅保留有匹配玩家的库
+            results = {name: data for name, data in results.items() if data is not None}
         
-        if "error" in results:
-            raise HTTPException(status_code=400, detail=results["error"])
+        if not results:
+            raise HTTPException(status_code=404, detail="未找到匹配的玩家")
         
         return {
             "status": "success",
             "related_type": related_type,
+            **db_meta,
             "query_conditions": {
                 "player_id": player_id,
                 "player_name": player_name,
@@ -159,17 +327,48 @@ def get_related_table(
         raise HTTPException(status_code=500, detail=f"关联查询失败：{str(e)}")
 
 # ---------------------- 3. 玩家专项查询接口 ----------------------
-@app.get("/api/player/multi-query", summary="玩家多维度查询（名称/QQ/IP/UUID）")
+@router.get("/api/player/multi-query", summary="玩家多维度查询（名称/QQ/IP/UUID）")
 def player_multi_query(
     player_name: Optional[str] = Query(None, description="玩家昵称（模糊匹配，如Slide2）"),
     qq_number: Optional[str] = Query(None, description="QQ号（精确匹配，如2651559189）"),
     qq_name: Optional[str] = Query(None, description="QQ昵称（模糊匹配，如歪优）"),
     ip: Optional[str] = Query(None, description="IP地址（模糊匹配，如114.88）"),
     uuid: Optional[str] = Query(None, description="玩家UUID（精确匹配，如765537e9-af61-3ac2-9ae5-57256eadfed5）"),
-    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,IpString）")
+    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,IpString）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC),
+    mode: Optional[str] = Query(None, description=MATCH_MODE_DESC)
 ):
+    check_match_mode(mode)
+    check_columns("Player", fields, db)
+    query_conditions = {
+        "player_name": player_name or "未传入",
+        "qq_number": qq_number or "未传入",
+        "qq_name": qq_name or "未传入",
+        "ip": ip or "未传入",
+        "uuid": uuid or "未传入"
+    }
     try:
-        results = query_player_by_multi_condition(
+        if mode:
+            # 仅统计/判断存在/取ID：不关联无关表、不构建行数据
+            result, db_meta = run_db_query(
+                db, match_player_by_multi_condition, mode,
+                player_name=player_name,
+                qq_number=qq_number,
+                qq_name=qq_name,
+                ip=ip,
+                uuid=uuid,
+                merge=False
+            )
+            return {
+                "status": "success",
+                **db_meta,
+                "mode": mode,
+                "query_conditions": query_conditions,
+                **build_match_response(mode, result, db_meta)
+            }
+        
+        results, db_meta = run_db_query(
+            db, query_player_by_multi_condition,
             player_name=player_name,
             qq_number=qq_number,
             qq_name=qq_name,
@@ -179,57 +378,82 @@ def player_multi_query(
         )
         return {
             "status": "success",
-            "query_conditions": {
-                "player_name": player_name or "未传入",
-                "qq_number": qq_number or "未传入",
-                "qq_name": qq_name or "未传入",
-                "ip": ip or "未传入",
-                "uuid": uuid or "未传入"
-            },
+            **db_meta,
+            "query_conditions": query_conditions,
             "total_matched_count": len(results),
             "data": results
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"玩家查询失败：{str(e)}")
 
-@app.get("/api/player/ip-uuid-query", summary="玩家IP/UUID专项查询")
+@router.get("/api/player/ip-uuid-query", summary="玩家IP/UUID专项查询")
 def player_ip_uuid_query(
     ip: Optional[str] = Query(None, description="IP地址（模糊/精确匹配，如114.88或127.0.0.1）"),
     uuid: Optional[str] = Query(None, description="玩家UUID（精确匹配，如765537e9-af61-3ac2-9ae5-57256eadfed5）"),
-    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,Ip,IpString）")
+    fields: Optional[List[str]] = Query(None, description="返回字段（如Id,Name,Ip,IpString）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC),
+    mode: Optional[str] = Query(None, description=MATCH_MODE_DESC)
 ):
     if not (ip or uuid):
         raise HTTPException(
             status_code=400,
             detail="至少需传入一个查询条件：ip 或 uuid"
         )
+    check_match_mode(mode)
+    check_columns("Player", fields, db)
+    query_conditions = {
+        "ip": ip or "未传入",
+        "uuid": uuid or "未传入"
+    }
     
     try:
-        results = query_player_by_multi_condition(
+        if mode:
+            # IP/UUID均为Player表字段，无需关联SocialAccount
+            result, db_meta = run_db_query(
+                db, match_player_by_multi_condition, mode,
+                ip=ip,
+                uuid=uuid,
+                merge=False
+            )
+            return {
+                "status": "success",
+                **db_meta,
+                "mode": mode,
+                "query_conditions": query_conditions,
+                **build_match_response(mode, result, db_meta)
+            }
+        
+        results, db_meta = run_db_query(
+            db, query_player_by_multi_condition,
             ip=ip,
             uuid=uuid,
             fields=fields
         )
         return {
             "status": "success",
-            "query_conditions": {
-                "ip": ip or "未传入",
-                "uuid": uuid or "未传入"
-            },
+            **db_meta,
+            "query_conditions": query_conditions,
             "total_matched_count": len(results),
             "data": results
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"IP/UUID查询失败：{str(e)}")
 
 # ---------------------- 4. Group表专项查询接口 ----------------------
-@app.get("/api/group/single-group", summary="Group表单群精确查询（按群号）")
+@router.get("/api/group/single-group", summary="Group表单群精确查询（按群号）")
 def get_single_group(
     group_id: int = Query(..., description="QQ群号（精确匹配，如665661136）"),
-    fields: Optional[List[str]] = Query(None, description="返回字段（如GroupId,Name,Enabled,MemberCount）")
+    fields: Optional[List[str]] = Query(None, description="返回字段（如GroupId,Name,Enabled,MemberCount）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC)
 ):
+    check_columns("Group", fields, db)
     try:
-        results = query_group_by_condition(
+        results, db_meta = run_db_query(
+            db, query_group_by_condition,
             group_id=group_id,
             fields=fields
         )
@@ -241,24 +465,54 @@ def get_single_group(
         
         return {
             "status": "success",
+            **db_meta,
             "query_condition": f"GroupId = {group_id}",
-            "data": results[0]
+            # 多库时同一群可能存在于多个库，返回全部匹配
+            "data": results if db_meta else results[0]
         }
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"单群查询失败：{str(e)}")
 
-@app.get("/api/group/multi-query", summary="Group表多条件筛选")
+@router.get("/api/group/multi-query", summary="Group表多条件筛选")
 def group_multi_query(
     group_name: Optional[str] = Query(None, description="群名称（模糊匹配，如EasyBot）"),
     enabled: Optional[int] = Query(None, description="启用状态（0=未启用，1=启用）"),
     min_member: Optional[int] = Query(None, description="最小成员数（如200，筛选≥200人的群）"),
     max_member: Optional[int] = Query(None, description="最大成员数（如500，筛选≤500人的群）"),
-    fields: Optional[List[str]] = Query(None, description="返回字段（如GroupId,Name,Enabled,MemberCount）")
+    fields: Optional[List[str]] = Query(None, description="返回字段（如GroupId,Name,Enabled,MemberCount）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC),
+    mode: Optional[str] = Query(None, description=MATCH_MODE_DESC.replace("ID列表", "群号列表"))
 ):
+    check_match_mode(mode)
+    check_columns("Group", fields, db)
+    query_conditions = {
+        "group_name": group_name or "未传入",
+        "enabled": enabled if enabled is not None else "未传入",
+        "min_member": min_member or "未传入",
+        "max_member": max_member or "未传入"
+    }
     try:
-        results = query_group_by_condition(
+        if mode:
+            result, db_meta = run_db_query(
+                db, match_group_by_condition, mode,
+                group_name=group_name,
+                enabled=enabled,
+                min_member=min_member,
+                max_member=max_member,
+                merge=False
+            )
+            return {
+                "status": "success",
+                **db_meta,
+                "mode": mode,
+                "query_conditions": query_conditions,
+                **build_match_response(mode, result, db_meta)
+            }
+        
+        results, db_meta = run_db_query(
+            db, query_group_by_condition,
             group_name=group_name,
             enabled=enabled,
             min_member=min_member,
@@ -267,18 +521,126 @@ def group_multi_query(
         )
         return {
             "status": "success",
-            "query_conditions": {
-                "group_name": group_name or "未传入",
-                "enabled": enabled if enabled is not None else "未传入",
-                "min_member": min_member or "未传入",
-                "max_member": max_member or "未传入"
-            },
+            **db_meta,
+            "query_conditions": query_conditions,
             "total_matched_count": len(results),
             "data": results
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Group表筛选失败：{str(e)}")
 
+# ---------------------- 5. 变更订阅接口（SSE） ----------------------
+@router.get("/api/subscribe", summary="订阅查询结果变更（Server-Sent Events，替代客户端轮询）")
+async def subscribe_query(
+    request: Request,
+    query_type: str = Query(..., description=f"订阅的查询类型，支持：{', '.join(SUBSCRIBABLE_QUERIES)}"),
+    params: Optional[str] = Query(None, description="查询参数（JSON字符串，与对应查询接口参数一致，如'{\"table_name\":\"Player\"}'）"),
+    db: Optional[str] = Query(None, description=DB_SELECTOR_DESC)
+):
+    """
+    注册查询并以SSE推送结果变化（由服务端单个后台线程统一检测数据库变更）
+    - snapshot事件：订阅时的完整结果（每个库一条）
+    - change事件：库变化后重查得到的差异（added新增行、removed消失行）
+    - error事件：首次查询或重查失败；每条事件均带source_db标记来源库
+    """
+    # 解析并校验查询参数
+    params_dict = {}
+    if params:
+        try:
+            params_dict = json.loads(params)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"params解析失败：{str(e)}（检查引号配对/逗号是否多余）")
+        if not isinstance(params_dict, dict):
+            raise HTTPException(status_code=400, detail="params格式错误！需传入JSON字典（如'{\"table_name\":\"Player\"}'）")
+    try:
+        validate_subscription_params(query_type, params_dict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if query_type == "single-table" and params_dict.get("table_name") not in SUPPORTED_TABLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的表名！仅支持：{', '.join(SUPPORTED_TABLES)}"
+        )
+    subscribe_table = {
+        "single-table": params_dict.get("table_name"),
+        "player-multi-query": "Player",
+        "group-multi-query": "Group"
+    }[query_type]
+    check_columns(subscribe_table, params_dict.get("fields"), db)
+    check_columns(subscribe_table, list(params_dict.get("conditions") or {}), db)
+    
+    try:
+        db_names = resolve_db_selector(db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # 首次快照经多库并发查询执行（受单库超时约束），失败的库不注册订阅
+    fanout = await run_in_threadpool(
+        query_across_databases, db_names, run_subscription_query, query_type, params_dict
+    )
+    if not fanout["results"]:
+        failed = "；".join(f"{name}: {msg}" for name, msg in fanout["errors"].items())
+        raise HTTPException(status_code=500, detail=f"订阅失败：所有数据库查询均失败（{failed}）")
+    
+    # 注册订阅，事件经队列转入SSE流
+    watcher = get_watcher()
+    queue: asyncio.Queue = asyncio.Queue()
+    callback = make_queue_callback(asyncio.get_running_loop(), queue)
+    tokens, snapshots = [], []
+    for db_name, initial_rows in fanout["results"].items():
+        token, rows = watcher.subscribe(db_name, query_type, params_dict, callback, initial_rows)
+        tokens.append(token)
+        snapshots.append({"source_db": db_name, "total_count": len(rows), "data": rows})
+    
+    async def event_stream():
+        try:
+            for snapshot in snapshots:
+                yield format_sse("snapshot", snapshot)
+            for db_name, detail in fanout["errors"].items():
+                yield format_sse("error", {"source_db": db_name, "detail": f"订阅失败：{detail}"})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=config.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    # 心跳注释行：保持连接并及时发现断开的客户端
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event.pop("event"), event)
+        finally:
+            for token in tokens:
+                watcher.unsubscribe(token)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ---------------------- 6. 健康检查接口 ----------------------
+# 健康检查供负载均衡/编排探针调用，不要求API Key；携带有效API Key时额外返回警告、错误等详情
+@app.get("/api/health", summary="健康/就绪检查（启动检查与预热完成后就绪，无需API Key）")
+def health_check(api_key: Optional[str] = Depends(api_key_header)):
+    """就绪时返回200，启动检查/预热进行中或存在启动错误时返回503"""
+    content = {
+        "status": "ready" if startup_state["ready"] else "not_ready",
+        "ready": startup_state["ready"],
+        "stage": startup_state["stage"],
+        "started_at": startup_state["started_at"],
+        "ready_at": startup_state["ready_at"]
+    }
+    # 详情含数据库路径等信息，仅对有效API Key返回
+    if api_key and api_key in config.api_keys:
+        content.update({
+            **startup_state,
+            "subscribers": get_watcher().subscriber_count()
+        })
+    return JSONResponse(status_code=200 if startup_state["ready"] else 503, content=content)
+
+# 注册需API Key认证的查询接口
+app.include_router(router)
+
 # ---------------------- 服务启动入口 ----------------------
 if __name__ == "__main__":
     import uvicorn
@@ -295,7 +657,11 @@ if __name__ == "__main__":
     print(f"  访问地址: http://{config.service_host}:{config.service_port}")
     print(f"  文档地址: http://{config.service_host}:{config.service_port}/docs (推荐通过文档测试接口)")
     print(f"\n[数据库配置]")
-    print(f"  文件路径: {config.db_path}")
+    for db_name, db_path in config.databases.items():
+        print(f"  {db_name}: {db_path}")
+    print(f"  多库查询: 单库超时 {config.query_timeout}s | 线程数 {config.query_workers}")
+    print(f"  变更订阅: 检查间隔 {config.poll_interval}s | 心跳间隔 {config.heartbeat_interval}s")
+    print(f"  启动预热: 预读文件 {'开启' if config.warm_pages else '关闭'} | 热点查询 {len(config.hot_queries)} 条（就绪状态见/api/health）")
     print(f"\n[API安全]")
     # 修复：直接使用列表遍历，移除split(',')调用
     masked_keys = [f"{k[:5]}***" for k in config.api_keys]
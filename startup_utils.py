@@ -0,0 +1,246 @@
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from config import get_config  # 用延迟加载的配置
+from db_utils import get_db_connection, resolve_db_path
+
+# 各接口筛选所用、需要索引的列（表名, 列名）
+INDEXED_FILTER_COLUMNS = [
+    ("Player", "Uuid"),
+    ("SocialAccount", "Uuid"),
+    ("Group", "GroupId"),
+    ("PlayerServerInfo", "PlayersId"),
+]
+
+# 表结构缓存：{库名: {"version": PRAGMA schema_version, "tables": {表名: [小写列名]}}}
+# （SQLite标识符不区分大小写，列名统一小写存储和比较）
+_schema_cache: Dict[str, Dict[str, Any]] = {}
+_schema_lock = threading.Lock()
+
+# 启动检查失败后的重试间隔（秒）
+INSPECT_RETRY_INTERVAL = 30
+
+# 启动检查失败的库：{库名: 错误信息}（重试成功后移除）
+_inspect_errors: Dict[str, str] = {}
+
+# 启动/就绪状态（供健康检查接口返回，stage依次为 pending/inspecting/warming/ready，检查失败时为failed）
+startup_state: Dict[str, Any] = {
+    "ready": False,
+    "stage": "pending",
+    "started_at": None,
+    "ready_at": None,
+    "warnings": [],
+    "errors": [],
+    "warmup": {}
+}
+
+def _quote(name: str) -> str:
+    """标识符加双引号（兼容Group等SQL关键字）"""
+    return '"' + name.replace('"', '""') + '"'
+
+def load_schema(tables: List[str], db_name: str) -> Dict[str, List[str]]:
+    """读取指定库中各表的列名（小写）并缓存（表不存在时不记录）"""
+    conn = None
+    try:
+        conn = get_db_connection(db_name)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA schema_version")
+        version = cursor.fetchone()[0]
+        schema = {}
+        for table in tables:
+            cursor.execute(f"PRAGMA table_info({_quote(table)})")
+            columns = [row["name"].lower() for row in cursor.fetchall()]
+            if columns:
+                schema[table] = columns
+        with _schema_lock:
+            _schema_cache[db_name] = {"version": version, "tables": schema}
+        return schema
+    except Exception as e:
+        raise Exception(f"表结构读取失败（库：{db_name}）：{str(e)}")
+    finally:
+        if conn:
+            conn.close()
+
+def _read_schema_version(db_name: str) -> int:
+    """读取库的 PRAGMA schema_version（表结构每次变更都会递增）"""
+    conn = None
+    try:
+        conn = get_db_connection(db_name)
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+    finally:
+        if conn:
+            conn.close()
+
+def get_table_columns(
+    table: str,
+    db_name: str,
+    tables: List[str],
+    refresh: bool = False
+) -> Optional[List[str]]:
+    """获取表的小写列名（优先使用启动时缓存的表结构），表不存在时返回None
+    
+    refresh=True时先比对 PRAGMA schema_version，表结构已变更（如迁移新增列）则重新读取
+    """
+    with _schema_lock:
+        cached = _schema_cache.get(db_name)
+    if cached is None or (refresh and _read_schema_version(db_name) != cached["version"]):
+        return load_schema(tables, db_name).get(table)
+    return cached["tables"].get(table)
+
+def find_unknown_columns(
+    table: str,
+    columns: List[str],
+    db_names: List[str],
+    tables: List[str]
+) -> List[str]:
+    """返回在任一所选库的表中不存在的列名（不区分大小写，返回调用方传入的原始写法）
+    
+    字段均存在时仅使用缓存的表结构（不访问SQLite）；出现未知字段时检查表结构版本，已变更则刷新缓存后复核
+    表结构无法读取的库（如启动检查失败）跳过校验，由查询本身按库报告失败
+    """
+    unknown = []
+    for db_name in db_names:
+        try:
+            known = set(get_table_columns(table, db_name, tables) or [])
+            if any(col.lower() not in known for col in columns):
+                known = set(get_table_columns(table, db_name, tables, refresh=True) or [])
+        except Exception:
+            continue
+        unknown.extend(col for col in columns if col.lower() not in known and col not in unknown)
+    return unknown
+
+def check_indexes(db_name: str) -> List[str]:
+    """检查接口筛选列是否有索引（列需为某个索引的首列，或为INTEGER PRIMARY KEY即rowid别名），返回警告列表"""
+    warnings = []
+    conn = None
+    try:
+        conn = get_db_connection(db_name)
+        cursor = conn.cursor()
+        for table, column in INDEXED_FILTER_COLUMNS:
+            # 单列INTEGER PRIMARY KEY是rowid别名，不出现在index_list中但查找同样走主键
+            cursor.execute(f"PRAGMA table_info({_quote(table)})")
+            pk_columns = [row for row in cursor.fetchall() if row["pk"] > 0]
+            indexed = (
+                len(pk_columns) == 1
+                and pk_columns[0]["name"].lower() == column.lower()
+                and pk_columns[0]["type"].upper() == "INTEGER"
+            )
+            
+            cursor.execute(f"PRAGMA index_list({_quote(table)})")
+            index_names = [row["name"] for row in cursor.fetchall()]
+            for index_name in index_names:
+                if indexed:
+                    break
+                cursor.execute(f"PRAGMA index_info({_quote(index_name)})")
+                index_columns = sorted(cursor.fetchall(), key=lambda row: row["seqno"])
+                if index_columns and (index_columns[0]["name"] or "").lower() == column.lower():
+                    indexed = True
+            if not indexed:
+                warnings.append(
+                    f"[{db_name}] {table}.{column} 缺少索引，相关查询将全表扫描"
+                    f"（建议：CREATE INDEX IX_{table}_{column} ON {_quote(table)}({column})）"
+                )
+        return warnings
+    except Exception as e:
+        raise Exception(f"索引检查失败（库：{db_name}）：{str(e)}")
+    finally:
+        if conn:
+            conn.close()
+
+def warm_pages(db_name: str, chunk_size: int = 1024 * 1024) -> int:
+    """顺序读取数据库文件（含WAL），将页面载入操作系统缓存，返回读取字节数"""
+    db_path = resolve_db_path(db_name)
+    total = 0
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+        except FileNotFoundError:
+            continue
+    return total
+
+def run_hot_queries(db_name: str, queries: List[str]) -> List[str]:
+    """执行配置的热点查询（结果丢弃），返回失败信息列表"""
+    errors = []
+    conn = None
+    try:
+        conn = get_db_connection(db_name)
+        cursor = conn.cursor()
+        for sql in queries:
+            try:
+                cursor.execute(sql)
+                cursor.fetchall()
+            except Exception as e:
+                errors.append(f"[{db_name}] 热点查询失败：{sql}（{str(e)}）")
+        return errors
+    finally:
+        if conn:
+            conn.close()
+
+def _inspect_databases(tables: List[str], db_names: List[str]) -> None:
+    """读取表结构并检查索引，失败的库记入_inspect_errors，成功的库从中移除"""
+    for db_name in db_names:
+        try:
+            schema = load_schema(tables, db_name)
+            warnings = []
+            missing_tables = [table for table in tables if table not in schema]
+            if missing_tables:
+                warnings.append(f"[{db_name}] 表不存在：{', '.join(missing_tables)}")
+            warnings.extend(check_indexes(db_name))
+            _inspect_errors.pop(db_name, None)
+        except Exception as e:
+            _inspect_errors[db_name] = str(e)
+            print(f"[启动错误] {e}")
+            continue
+        startup_state["warnings"].extend(warnings)
+        for message in warnings:
+            print(f"[启动警告] {message}")
+    startup_state["errors"] = list(_inspect_errors.values())
+
+def run_startup_checks(tables: List[str]) -> None:
+    """启动检查：读取各库表结构、检查筛选列索引（警告直接打印）"""
+    startup_state["stage"] = "inspecting"
+    startup_state["started_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _inspect_databases(tables, list(get_config().databases))
+
+def _run_warmup(tables: List[str]) -> None:
+    """预热各库（文件页面 + 热点查询）；启动检查有失败的库时定期重试，全部成功后标记就绪"""
+    config = get_config()
+    if config.warm_pages or config.hot_queries:
+        startup_state["stage"] = "warming"
+        for db_name in config.databases:
+            start = time.monotonic()
+            result: Dict[str, Any] = {}
+            try:
+                if config.warm_pages:
+                    result["warmed_bytes"] = warm_pages(db_name)
+                if config.hot_queries:
+                    hot_errors = run_hot_queries(db_name, config.hot_queries)
+                    result["hot_queries"] = len(config.hot_queries) - len(hot_errors)
+                    startup_state["warnings"].extend(hot_errors)
+                    for message in hot_errors:
+                        print(f"[启动警告] {message}")
+            except Exception as e:
+                # 预热仅为优化，失败不影响就绪
+                startup_state["warnings"].append(f"[{db_name}] 预热失败：{str(e)}")
+                print(f"[启动警告] [{db_name}] 预热失败：{str(e)}")
+            result["seconds"] = round(time.monotonic() - start, 3)
+            startup_state["warmup"][db_name] = result
+
+    while _inspect_errors:
+        startup_state["stage"] = "failed"
+        time.sleep(INSPECT_RETRY_INTERVAL)
+        _inspect_databases(tables, list(_inspect_errors))
+
+    startup_state["stage"] = "ready"
+    startup_state["ready"] = True
+    startup_state["ready_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def start_warmup(tables: List[str]) -> None:
+    """后台线程执行预热（及失败检查的重试），期间服务可正常响应，就绪状态为未就绪"""
+    threading.Thread(target=_run_warmup, args=(tables,), name="db-warmup", daemon=True).start()
@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+import time
+import asyncio
+from itertools import count
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from config import get_config  # 用延迟加载的配置
+from db_utils import (
+    get_db_connection, resolve_db_path, _run_with_deadline,
+    query_single_table, query_player_by_multi_condition, query_group_by_condition
+)
+
+# 支持订阅的查询类型：查询函数 + 允许的参数
+SUBSCRIBABLE_QUERIES: Dict[str, Tuple[Callable, set]] = {
+    "single-table": (query_single_table, {"table_name", "conditions", "fields"}),
+    "player-multi-query": (
+        query_player_by_multi_condition,
+        {"player_name", "qq_number", "qq_name", "ip", "uuid", "fields"}
+    ),
+    "group-multi-query": (
+        query_group_by_condition,
+        {"group_id", "group_name", "enabled", "min_member", "max_member", "fields"}
+    ),
+}
+
+# 订阅参数的类型要求（校验失败时接口直接返回400，不进入查询）
+_PARAM_TYPES: Dict[str, str] = {
+    "table_name": "str", "conditions": "dict", "fields": "str_list",
+    "player_name": "str", "qq_number": "str", "qq_name": "str", "ip": "str", "uuid": "str",
+    "group_id": "int", "group_name": "str", "enabled": "int", "min_member": "int", "max_member": "int",
+}
+_PARAM_TYPE_DESC = {"str": "字符串", "int": "整数", "dict": "JSON字典", "str_list": "非空字符串列表（如[\"Id\",\"Name\"]）"}
+
+def validate_subscription_params(query_type: str, params: Dict[str, Any]) -> None:
+    """校验订阅参数名与类型，不合法时抛出ValueError"""
+    if query_type not in SUBSCRIBABLE_QUERIES:
+        raise ValueError(f"不支持订阅的查询类型：{query_type}（仅支持：{', '.join(SUBSCRIBABLE_QUERIES)}）")
+    unknown_params = set(params) - SUBSCRIBABLE_QUERIES[query_type][1]
+    if unknown_params:
+        raise ValueError(f"{query_type} 不支持的参数：{', '.join(sorted(unknown_params))}")
+    
+    for name, value in params.items():
+        expected = _PARAM_TYPES[name]
+        if value is None and name != "table_name":
+            continue
+        if expected == "str":
+            valid = isinstance(value, str)
+        elif expected == "int":
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        elif expected == "dict":
+            valid = isinstance(value, dict)
+        else:
+            valid = (
+                isinstance(value, list) and len(value) > 0
+                and all(isinstance(item, str) for item in value)
+            )
+        if not valid:
+            raise ValueError(f"参数 {name} 类型错误，需为{_PARAM_TYPE_DESC[expected]}")
+    
+    if query_type == "player-multi-query" and not any(
+        params.get(name) for name in ("player_name", "qq_number", "qq_name", "ip", "uuid")
+    ):
+        raise ValueError("至少需传入一个查询条件：player_name/qq_number/qq_name/ip/uuid")
+
+def run_subscription_query(query_type: str, params: Dict[str, Any], db_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """执行订阅查询（供首次快照经多库并发查询调用）"""
+    query_func = SUBSCRIBABLE_QUERIES[query_type][0]
+    return query_func(**params, db_name=db_name)
+
+def _row_key(row: Dict[str, Any]) -> str:
+    """行的规范化表示（用于比较前后两次查询结果）"""
+    return json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+
+def diff_rows(old_rows: List[Dict[str, Any]], new_rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """计算结果差异：added为新增行，removed为消失行（行内容变化视为删除旧行+新增新行）"""
+    old_counts: Dict[str, int] = {}
+    for row in old_rows:
+        key = _row_key(row)
+        old_counts[key] = old_counts.get(key, 0) + 1
+
+    added = []
+    for row in new_rows:
+        key = _row_key(row)
+        if old_counts.get(key):
+            old_counts[key] -= 1
+        else:
+            added.append(row)
+
+    removed = []
+    for row in old_rows:
+        key = _row_key(row)
+        if old_counts.get(key):
+            old_counts[key] -= 1
+            removed.append(row)
+    return {"added": added, "removed": removed}
+
+class _WatchedQuery:
+    """被监听的查询：相同库+相同查询的订阅者共享一次重查"""
+    def __init__(self, db_name: str, query_type: str, params: Dict[str, Any], rows: List[Dict[str, Any]]):
+        self.db_name = db_name
+        self.query_type = query_type
+        self.params = params
+        self.rows = rows
+        self.subscribers: Dict[int, Callable[[Dict[str, Any]], None]] = {}
+        # 新注册的查询：快照取自注册之前，下轮无论库是否变化都重查一次，补上期间的写入
+        self.dirty = True
+
+    def run(self) -> List[Dict[str, Any]]:
+        return run_subscription_query(self.query_type, self.params, db_name=self.db_name)
+
+class ChangeWatcher:
+    """变更监听器：单个后台线程统一检查各库 PRAGMA data_version 与文件修改时间，
+    仅在库发生变化时重查该库上的订阅查询，并向订阅者推送结果差异"""
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._queries: Dict[tuple, _WatchedQuery] = {}
+        self._tokens: Dict[int, tuple] = {}
+        self._token_counter = count(1)
+        self._db_states: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(
+        self,
+        db_name: str,
+        query_type: str,
+        params: Dict[str, Any],
+        callback: Callable[[Dict[str, Any]], None],
+        initial_rows: List[Dict[str, Any]]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """注册订阅，返回(订阅令牌, 当前结果快照)；callback在监听线程中被调用
+        
+        initial_rows为调用方已查得的首次结果；该查询已被监听时改用监听中的结果，保证后续差异连续
+        """
+        if query_type not in SUBSCRIBABLE_QUERIES:
+            raise ValueError(f"不支持订阅的查询类型：{query_type}（仅支持：{', '.join(SUBSCRIBABLE_QUERIES)}）")
+        key = (db_name, query_type, _row_key(params))
+
+        with self._lock:
+            watched = self._queries.setdefault(key, _WatchedQuery(db_name, query_type, params, initial_rows))
+            token = next(self._token_counter)
+            watched.subscribers[token] = callback
+            self._tokens[token] = key
+            snapshot = list(watched.rows)
+        self._ensure_started()
+        return token, snapshot
+
+    def unsubscribe(self, token: int) -> None:
+        """取消订阅，查询无订阅者时停止监听该查询"""
+        with self._lock:
+            key = self._tokens.pop(token, None)
+            watched = self._queries.get(key) if key else None
+            if watched is None:
+                return
+            watched.subscribers.pop(token, None)
+            if not watched.subscribers:
+                del self._queries[key]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._tokens)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-change-watcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._queries:
+                    # 无订阅时退出线程，下次订阅时重新启动
+                    self._thread = None
+                    self._close_db_states()
+                    return
+                watched_dbs = {watched.db_name for watched in self._queries.values()}
+                dirty_dbs = {watched.db_name for watched in self._queries.values() if watched.dirty}
+
+            for db_name in watched_dbs:
+                if self._db_changed(db_name):
+                    self._refresh_queries(db_name)
+                elif db_name in dirty_dbs:
+                    self._refresh_queries(db_name, dirty_only=True)
+
+    def _db_changed(self, db_name: str) -> bool:
+        """检查库是否变化：文件（含WAL）修改时间 + 监听连接上的 PRAGMA data_version"""
+        state = self._db_states.get(db_name)
+        try:
+            db_path = resolve_db_path(db_name)
+            mtimes = tuple(
+                os.stat(path).st_mtime_ns if os.path.exists(path) else None
+                for path in (db_path, f"{db_path}-wal")
+            )
+            if state is None:
+                # 首次检查：建立监听连接并记录基线，同时重查一次以补上快照之后的变化
+                conn = get_db_connection(db_name)
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                self._db_states[db_name] = {"conn": conn, "version": version, "mtimes": mtimes}
+                return True
+
+            version = state["conn"].execute("PRAGMA data_version").fetchone()[0]
+            changed = version != state["version"] or mtimes != state["mtimes"]
+            state["version"], state["mtimes"] = version, mtimes
+            return changed
+        except Exception:
+            # 库暂不可用时丢弃监听连接，下轮重新建立
+            if state is not None:
+                state["conn"].close()
+                self._db_states.pop(db_name, None)
+            return False
+
+    def _refresh_queries(self, db_name: str, dirty_only: bool = False) -> None:
+        """重查发生变化的库上的订阅查询（dirty_only时仅重查新注册的查询），仅推送有差异的结果"""
+        with self._lock:
+            affected = [
+                watched for watched in self._queries.values()
+                if watched.db_name == db_name and (watched.dirty or not dirty_only)
+            ]
+            for watched in affected:
+                watched.dirty = False
+
+        timeout = get_config().query_timeout
+        for watched in affected:
+            try:
+                # 重查受单库超时约束，慢查询/锁库不会阻塞其他订阅的变更推送
+                new_rows = _run_with_deadline(watched.run, timeout)
+                event = None
+                diff = diff_rows(watched.rows, new_rows)
+                if diff["added"] or diff["removed"]:
+                    event = {"event": "change", "total_count": len(new_rows), **diff}
+            except Exception as e:
+                detail = f"查询超时（超过{timeout}秒，已中断）" if "interrupted" in str(e) else str(e)
+                event = {"event": "error", "detail": detail}
+                new_rows = watched.rows
+
+            with self._lock:
+                watched.rows = new_rows
+                callbacks = list(watched.subscribers.values())
+            if event is None:
+                continue
+            for callback in callbacks:
+                callback({"source_db": db_name, **event})
+
+    def _close_db_states(self) -> None:
+        for state in self._db_states.values():
+            state["conn"].close()
+        self._db_states.clear()
+
+# 延迟初始化监听器
+watcher = None
+_watcher_lock = threading.Lock()
+
+def get_watcher() -> ChangeWatcher:
+    """获取变更监听器单例（延迟初始化）"""
+    global watcher
+    if watcher is None:
+        with _watcher_lock:
+            if watcher is None:
+                watcher = ChangeWatcher(get_config().poll_interval)
+    return watcher
+
+def make_queue_callback(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> Callable[[Dict[str, Any]], None]:
+    """将监听线程的推送转入事件循环中的队列（线程安全）"""
+    def callback(event: Dict[str, Any]) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            # 事件循环已关闭（客户端已断开），忽略
+            pass
+    return callback
+
+def format_sse(event: str, data: Any) -> str:
+    """格式化为 Server-Sent Events 消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"